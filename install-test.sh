@@ -289,6 +289,9 @@ install_dependencies_minimal() {
     print_info "Installing audio processing..."
     pip install librosa>=0.10.0
     pip install soundfile>=0.12.0
+    pip install soxr>=0.3.0
+    pip install orjson>=3.9.0
+    pip install python-dotenv>=1.0.0
     
     # Test core functionality
     print_info "Testing core imports..."
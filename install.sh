@@ -222,6 +222,8 @@ install_python_dependencies() {
     print_info "Installing audio processing libraries..."
     pip install 'librosa>=0.10.0'
     pip install 'soundfile>=0.12.0'
+    pip install 'soxr>=0.3.0'
+    pip install 'orjson>=3.9.0'
     
     print_info "Installing PyTorch (CPU version for compatibility)..."
     pip install 'torch>=2.0.0' 'torchaudio>=2.0.0'
@@ -234,6 +236,7 @@ install_python_dependencies() {
     pip install 'transformers>=4.35.0'
     pip install 'huggingface-hub>=0.17.0'
     pip install 'requests>=2.31.0'
+    pip install 'python-dotenv>=1.0.0'
     pip install 'pandas>=2.0.0'
     pip install 'scipy>=1.11.0'
     
@@ -0,0 +1,127 @@
+"""
+Fused Attention Fix for MLX Whisper
+
+This module provides a monkey-patch for mlx_whisper's multi-head attention
+to use MLX's fused scaled dot-product attention kernel.
+
+The stock implementation materializes the full softmax(QK^T)V product in
+Python-level MLX ops. mx.fast.scaled_dot_product_attention computes the same
+result in a single Metal kernel, which is considerably faster in the encoder.
+
+Word-level timestamps need the raw attention weights for alignment, so the
+original implementation is used while cross-attention weights are collected.
+
+A second patch lets the audio encoder accept mel windows shorter than 30 s,
+so trailing audio does not have to be padded with silence before encoding.
+"""
+
+import threading
+
+# Store original mlx_whisper functions
+_original_qkv_attention = None
+_original_forward_with_cross_qk = None
+_original_encoder_call = None
+
+# Set while attention weights must be returned (word timestamp alignment)
+_state = threading.local()
+
+def _patched_qkv_attention(self, q, k, v, mask=None):
+    """Patched attention that uses the fused MLX kernel"""
+    if getattr(_state, 'need_qk', False):
+        return _original_qkv_attention(self, q, k, v, mask)
+    
+    import mlx.core as mx
+    
+    n_batch, n_ctx, n_state = q.shape
+    head_dim = n_state // self.n_head
+    q = q.reshape(*q.shape[:2], self.n_head, -1).transpose(0, 2, 1, 3)
+    k = k.reshape(*k.shape[:2], self.n_head, -1).transpose(0, 2, 1, 3)
+    v = v.reshape(*v.shape[:2], self.n_head, -1).transpose(0, 2, 1, 3)
+    
+    if mask is not None:
+        mask = mask[:n_ctx, :n_ctx]
+    
+    out = mx.fast.scaled_dot_product_attention(
+        q, k, v, scale=head_dim ** -0.5, mask=mask
+    )
+    out = out.transpose(0, 2, 1, 3).reshape(n_batch, n_ctx, n_state)
+    return out, None
+
+def _patched_forward_with_cross_qk(self, *args, **kwargs):
+    """Run the unpatched attention so cross-attention weights are available"""
+    _state.need_qk = True
+    try:
+        return _original_forward_with_cross_qk(self, *args, **kwargs)
+    finally:
+        _state.need_qk = False
+
+def _patched_encoder_call(self, x):
+    """Patched encoder that trims the positional embedding to short inputs"""
+    # Output length of conv2 (kernel 3, stride 2, padding 1)
+    n_ctx = (x.shape[1] - 1) // 2 + 1
+    positional_embedding = self._positional_embedding
+    if n_ctx >= positional_embedding.shape[0]:
+        return _original_encoder_call(self, x)
+    
+    self._positional_embedding = positional_embedding[:n_ctx]
+    try:
+        return _original_encoder_call(self, x)
+    finally:
+        self._positional_embedding = positional_embedding
+
+def apply_attention_fix():
+    """Apply the fused attention fix"""
+    global _original_qkv_attention, _original_forward_with_cross_qk
+    
+    if _original_qkv_attention is not None:
+        return True  # Already applied
+    
+    try:
+        import mlx.core as mx
+        from mlx_whisper.whisper import MultiHeadAttention, Whisper
+        
+        if not hasattr(mx.fast, 'scaled_dot_product_attention'):
+            print("⚠️  MLX has no fused attention kernel, attention fix not applied")
+            return False
+        
+        # Store original functions
+        _original_qkv_attention = MultiHeadAttention.qkv_attention
+        _original_forward_with_cross_qk = Whisper.forward_with_cross_qk
+        
+        # Apply patch
+        MultiHeadAttention.qkv_attention = _patched_qkv_attention
+        Whisper.forward_with_cross_qk = _patched_forward_with_cross_qk
+        
+        print("✅ Fused attention fix applied successfully")
+        return True
+    
+    except ImportError:
+        print("⚠️  MLX Whisper not available, attention fix not applied")
+    except Exception as e:
+        print(f"⚠️  Failed to apply attention fix: {e}")
+    return False
+
+def apply_encoder_fix():
+    """Apply the variable-length encoder fix"""
+    global _original_encoder_call
+    
+    if _original_encoder_call is not None:
+        return True  # Already applied
+    
+    try:
+        from mlx_whisper.whisper import AudioEncoder
+        
+        # Store original function
+        _original_encoder_call = AudioEncoder.__call__
+        
+        # Apply patch
+        AudioEncoder.__call__ = _patched_encoder_call
+        
+        print("✅ Variable-length encoder fix applied successfully")
+        return True
+    
+    except ImportError:
+        print("⚠️  MLX Whisper not available, encoder fix not applied")
+    except Exception as e:
+        print(f"⚠️  Failed to apply encoder fix: {e}")
+    return False
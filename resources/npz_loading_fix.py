@@ -7,42 +7,101 @@ with NPZ file loading in PyInstaller and other bundled environments.
 The issue occurs because bundled environments virtualize the file system,
 but NumPy's NPZ loading expects real file system access for ZIP operations.
 
-This fix copies NPZ files to temporary locations when needed.
+This fix memory-maps NPZ files and hands NumPy a seekable buffer when needed.
 """
 
+import io
 import os
 import sys
-import tempfile
-import shutil
 from pathlib import Path
 
 # Store original numpy.load function
 _original_numpy_load = None
-_temp_files = []
+
+# Whether NPZ archives must be read into memory; probed on first NPZ load
+_NEEDS_BYTES_FALLBACK = None
+
+_ZIP_SIGNATURE = b'PK\x03\x04'
 
 def _is_bundled_environment():
     """Detect if we're running in a bundled environment"""
-    return (
+    return bool(
         getattr(sys, 'frozen', False) or  # PyInstaller
         hasattr(sys, '_MEIPASS') or      # PyInstaller temp folder
         '__compiled__' in globals() or    # Nuitka
-        'site-packages.zip' in sys.path[0]  # cx_Freeze
+        (sys.path and 'site-packages.zip' in sys.path[0])  # cx_Freeze
     )
 
-def _copy_to_temp(file_path):
-    """Copy file to temporary location and track for cleanup"""
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.npz')
-    temp_file.close()
+# Bundling cannot change at runtime, so detect it once at import
+_BUNDLED = _is_bundled_environment()
+
+def _is_zip_file(file_path):
+    """Check for the local file header signature that starts every NPZ archive"""
+    with open(file_path, 'rb') as f:
+        return f.read(4) == _ZIP_SIGNATURE
+
+def _probe_zip_access(file_path):
+    """Check whether ZIP archives can be opened directly from the file system"""
+    import zipfile
+    
+    try:
+        with zipfile.ZipFile(str(file_path)):
+            return False
+    except (OSError, io.UnsupportedOperation):
+        return True
+    except zipfile.BadZipFile:
+        return None  # Header is valid, so broken tail reads; inconclusive for later files
+
+class _MappedFile:
+    """Minimal seekable file object over a read-only mmap (mmap has no seekable() before Python 3.13)"""
+    
+    def __init__(self, mapping):
+        self._mapping = mapping
+    
+    def read(self, size=-1):
+        return self._mapping.read(size)
+    
+    def seek(self, offset, whence=0):
+        self._mapping.seek(offset, whence)
+        return self._mapping.tell()
+    
+    def tell(self):
+        return self._mapping.tell()
+    
+    def seekable(self):
+        return True
+    
+    def close(self):
+        self._mapping.close()
+
+def _load_from_memory(file_path, mmap_mode=None, allow_pickle=False,
+                      fix_imports=True, encoding='ASCII', **kwargs):
+    """Memory-map NPZ file and open it as an NpzFile without numpy.load"""
+    import mmap
+    from numpy.lib.npyio import NpzFile
     
-    shutil.copy2(file_path, temp_file.name)
-    _temp_files.append(temp_file.name)
+    with open(file_path, 'rb') as f:
+        buffer = _MappedFile(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
     
-    return temp_file.name
+    try:
+        # NpzFile reads members lazily and closes the mapping on close()
+        return NpzFile(
+            buffer,
+            own_fid=True,
+            allow_pickle=allow_pickle,
+            pickle_kwargs=dict(encoding=encoding, fix_imports=fix_imports),
+            **kwargs
+        )
+    except Exception:
+        buffer.close()
+        raise
 
 def _patched_numpy_load(file, *args, **kwargs):
     """Patched version of numpy.load that handles bundled environments"""
+    global _NEEDS_BYTES_FALLBACK
+    
     # If not in bundled environment, use original function
-    if not _is_bundled_environment():
+    if not _BUNDLED:
         return _original_numpy_load(file, *args, **kwargs)
     
     # Handle file path or file-like object
@@ -51,31 +110,29 @@ def _patched_numpy_load(file, *args, **kwargs):
         
         # Check if it's an NPZ file
         if file_path.suffix.lower() == '.npz' and file_path.exists():
-            try:
-                # First try original load
+            # Not a ZIP archive, so the fallback cannot help; let NumPy handle it
+            if not _is_zip_file(file_path):
                 return _original_numpy_load(file, *args, **kwargs)
-            except Exception as e:
-                # If it fails and error mentions zip/file-like, try temp copy
-                if 'zip' in str(e).lower() or 'file-like' in str(e).lower():
-                    print(f"NPZ loading fix: copying {file_path} to temp location...")
-                    temp_path = _copy_to_temp(file_path)
-                    return _original_numpy_load(temp_path, *args, **kwargs)
-                else:
-                    raise
+            
+            # Probe once whether the file system supports direct ZIP access
+            if _NEEDS_BYTES_FALLBACK is None:
+                needs_fallback = _probe_zip_access(file_path)
+                
+                # BadZipFile despite a valid header: read this file from memory,
+                # but leave the decision for later files open
+                if needs_fallback is None:
+                    return _load_from_memory(file_path, *args, **kwargs)
+                
+                _NEEDS_BYTES_FALLBACK = needs_fallback
+                if _NEEDS_BYTES_FALLBACK:
+                    print("NPZ loading fix: direct ZIP access unavailable, loading NPZ files from memory")
+            
+            if _NEEDS_BYTES_FALLBACK:
+                return _load_from_memory(file_path, *args, **kwargs)
     
     # For non-NPZ files or file-like objects, use original
     return _original_numpy_load(file, *args, **kwargs)
 
-def cleanup_temp_files():
-    """Clean up temporary NPZ files"""
-    for temp_file in _temp_files:
-        try:
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
-        except Exception:
-            pass
-    _temp_files.clear()
-
 def apply_npz_fix():
     """Apply the NPZ loading fix"""
     global _original_numpy_load
@@ -92,10 +149,6 @@ def apply_npz_fix():
         # Apply patch
         np.load = _patched_numpy_load
         
-        # Register cleanup at exit
-        import atexit
-        atexit.register(cleanup_temp_files)
-        
         print("✅ NPZ loading fix applied successfully")
         
     except ImportError:
@@ -104,7 +157,7 @@ def apply_npz_fix():
         print(f"⚠️  Failed to apply NPZ fix: {e}")
 
 # Auto-apply fix when module is imported
-if _is_bundled_environment():
+if _BUNDLED:
     apply_npz_fix()
-else:
+elif os.getenv('LOG_LEVEL', '').upper() == 'DEBUG':
     print("🔧 NPZ loading fix available but not needed (not in bundled environment)")
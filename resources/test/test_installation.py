@@ -9,31 +9,53 @@ It performs system checks, dependency validation, and a sample transcription tes
 import os
 import sys
 import json
+import importlib
+import importlib.util
+import platform
+import threading
+import concurrent.futures
+import functools
 import subprocess
 import tempfile
 import wave
-import struct
-import math
+import shutil
 from pathlib import Path
 
+# Status prefixes shared by the print helpers and the summary
+_OK, _WARN, _ERR, _INFO = "✅ ", "⚠️  ", "❌ ", "ℹ️  "
+PASS_S, FAIL_S = "✅ PASS", "❌ FAIL"
+
+# npz_loading_fix.py sits one level above this test directory
+NPZ_FIX_FILE = Path(__file__).resolve().parent.parent / "npz_loading_fix.py"
+
+# Per-thread output buffer so parallel tests don't interleave their lines
+_output = threading.local()
+
+def _emit(line):
+    lines = getattr(_output, 'lines', None)
+    if lines is None:
+        print(line)
+    else:
+        lines.append(line)
+
 def print_header():
     print("🔧 Audio2Text Installation Test")
     print("=" * 40)
 
 def print_test(name):
-    print(f"\n📋 Testing: {name}")
+    _emit(f"\n📋 Testing: {name}")
 
 def print_success(msg):
-    print(f"✅ {msg}")
+    _emit(_OK + msg)
 
 def print_warning(msg):
-    print(f"⚠️  {msg}")
+    _emit(_WARN + msg)
 
 def print_error(msg):
-    print(f"❌ {msg}")
+    _emit(_ERR + msg)
 
 def print_info(msg):
-    print(f"ℹ️  {msg}")
+    _emit(_INFO + msg)
 
 def test_system_requirements():
     """Test system requirements"""
@@ -41,8 +63,10 @@ def test_system_requirements():
     
     # Check macOS version
     try:
-        result = subprocess.run(['sw_vers', '-productVersion'], capture_output=True, text=True)
-        macos_version = result.stdout.strip()
+        macos_version = platform.mac_ver()[0]
+        if not macos_version:
+            print_error(f"Not running on macOS: {platform.system()}")
+            return False
         major = int(macos_version.split('.')[0])
         if major >= 11:
             print_success(f"macOS version: {macos_version} ✓")
@@ -55,8 +79,7 @@ def test_system_requirements():
     
     # Check architecture
     try:
-        result = subprocess.run(['uname', '-m'], capture_output=True, text=True)
-        arch = result.stdout.strip()
+        arch = platform.machine()
         if arch == 'arm64':
             print_success(f"Architecture: {arch} ✓")
         else:
@@ -108,7 +131,7 @@ def test_core_dependencies():
                 import mlx_whisper
                 print_success(f"{display_name}: Available ✓")
             else:
-                exec(f"import {module_name}")
+                importlib.import_module(module_name)
                 print_success(f"{display_name}: Available ✓")
         except ImportError as e:
             print_error(f"{display_name}: Missing - {e}")
@@ -129,13 +152,15 @@ def test_optional_dependencies():
     
     for module_name, display_name in optional_deps:
         try:
-            exec(f"import {module_name}")
+            importlib.import_module(module_name)
             print_success(f"{display_name}: Available ✓")
         except ImportError:
             print_warning(f"{display_name}: Not available (optional)")
 
 def create_test_audio(filename, duration=3.0, sample_rate=16000):
     """Create a simple test audio file"""
+    import numpy as np
+    
     with wave.open(filename, 'w') as wav_file:
         wav_file.setnchannels(1)  # Mono
         wav_file.setsampwidth(2)  # 16-bit
@@ -143,9 +168,12 @@ def create_test_audio(filename, duration=3.0, sample_rate=16000):
         
         # Generate a simple sine wave (440 Hz A note)
         frequency = 440.0
-        for i in range(int(sample_rate * duration)):
-            sample = int(32767 * math.sin(2 * math.pi * frequency * i / sample_rate))
-            wav_file.writeframes(struct.pack('<h', sample))
+        t = np.arange(int(sample_rate * duration)) / sample_rate
+        samples = (32767 * np.sin(2 * np.pi * frequency * t)).astype('<i2')
+        
+        # Declare the frame count up front so the header needs no patching
+        wav_file.setnframes(len(samples))
+        wav_file.writeframesraw(samples.tobytes())
 
 def test_audio_processing():
     """Test audio file processing"""
@@ -181,6 +209,48 @@ def test_audio_processing():
         print_error(f"Audio processing failed: {e}")
         return False
 
+def test_npz_loading_fix():
+    """Test the bundled-environment NPZ fallback reads archive members"""
+    print_test("NPZ Loading Fix")
+    
+    try:
+        import numpy as np
+        
+        # Load by path; tests run in parallel threads, so leave sys.path alone
+        spec = importlib.util.spec_from_file_location("npz_loading_fix", NPZ_FIX_FILE)
+        npz_loading_fix = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(npz_loading_fix)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            npz_path = Path(temp_dir) / "check.npz"
+            expected = np.arange(16, dtype=np.float32).reshape(4, 4)
+            np.savez(npz_path, data=expected)
+            
+            with npz_loading_fix._load_from_memory(npz_path) as npz:
+                loaded = npz['data']
+        
+        if np.array_equal(loaded, expected):
+            print_success("In-memory NPZ fallback: Members readable ✓")
+            return True
+        print_error("In-memory NPZ fallback: Member data mismatch")
+        return False
+        
+    except Exception as e:
+        print_error(f"In-memory NPZ fallback failed: {e}")
+        return False
+
+@functools.lru_cache(maxsize=None)
+def _load_env(env_file):
+    """Parse a KEY=VALUE env file into a dict, skipping comments and export prefixes"""
+    # Same parsing as the python-dotenv fallback in transcribe_standalone.py
+    env = {}
+    for line in env_file.read_text().splitlines():
+        key, sep, value = line.strip().partition('=')
+        key = key.removeprefix('export ').strip()
+        if sep and key and not key.startswith('#'):
+            env[key] = value.strip().strip('"\'')
+    return env
+
 def test_model_access():
     """Test model downloading/access"""
     print_test("Model Access")
@@ -191,12 +261,9 @@ def test_model_access():
         # Try loading from config file
         config_file = Path.home() / "Applications" / "Audio2Text" / "config" / "env"
         if config_file.exists():
-            with open(config_file) as f:
-                for line in f:
-                    if line.startswith('HF_TOKEN='):
-                        hf_token = line.split('=', 1)[1].strip()
-                        os.environ['HF_TOKEN'] = hf_token
-                        break
+            hf_token = _load_env(config_file).get('HF_TOKEN', '')
+            if hf_token:
+                os.environ['HF_TOKEN'] = hf_token
     
     if hf_token:
         print_success("HuggingFace token: Configured ✓")
@@ -220,13 +287,15 @@ def test_cli_access():
     
     # Check if audio2text command is available
     try:
-        result = subprocess.run(['which', 'audio2text'], capture_output=True, text=True)
-        if result.returncode == 0:
-            cli_path = result.stdout.strip()
+        cli_path = shutil.which('audio2text')
+        if cli_path:
             print_success(f"CLI available: {cli_path} ✓")
             
-            # Test help command
-            result = subprocess.run(['audio2text', '--help'], capture_output=True, text=True)
+            # Running --help loads the full transcription stack, so it is opt-in
+            if not os.getenv('AUDIO2TEXT_TEST_CLI_HELP'):
+                return True
+            
+            result = subprocess.run([cli_path, '--help'], capture_output=True, text=True)
             if result.returncode == 0:
                 print_success("CLI help: Working ✓")
                 return True
@@ -262,10 +331,17 @@ def test_directory_structure():
         "venv"
     ]
     
+    # List the base directory once instead of checking each path separately
+    if base_dir.is_dir():
+        existing = {entry.name for entry in os.scandir(base_dir) if entry.is_dir()}
+        existing.add("")
+    else:
+        existing = set()
+    
     success = True
     for dir_name in required_dirs:
         dir_path = base_dir / dir_name
-        if dir_path.exists():
+        if dir_name in existing:
             print_success(f"Directory exists: {dir_path} ✓")
         else:
             print_error(f"Directory missing: {dir_path}")
@@ -273,6 +349,19 @@ def test_directory_structure():
     
     return success
 
+def _run_buffered(test_name, test_func):
+    """Run a test while collecting its output for later, in-order printing"""
+    _output.lines = []
+    try:
+        try:
+            result = test_func()
+        except Exception as e:
+            print_error(f"Test {test_name} crashed: {e}")
+            result = False
+        return result, _output.lines
+    finally:
+        del _output.lines
+
 def run_comprehensive_test():
     """Run all tests"""
     print_header()
@@ -283,18 +372,24 @@ def run_comprehensive_test():
         ("Core Dependencies", test_core_dependencies),
         ("Optional Dependencies", test_optional_dependencies),
         ("Audio Processing", test_audio_processing),
+        ("NPZ Loading Fix", test_npz_loading_fix),
         ("Model Access", test_model_access),
         ("CLI Access", test_cli_access),
         ("Directory Structure", test_directory_structure)
     ]
     
+    # Tests are independent and mostly wait on I/O, so run them concurrently
+    # and print each test's output in the original order
     results = {}
-    for test_name, test_func in tests:
-        try:
-            results[test_name] = test_func()
-        except Exception as e:
-            print_error(f"Test {test_name} crashed: {e}")
-            results[test_name] = False
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            (test_name, executor.submit(_run_buffered, test_name, test_func))
+            for test_name, test_func in tests
+        ]
+        for test_name, future in futures:
+            results[test_name], lines = future.result()
+            for line in lines:
+                print(line)
     
     # Summary
     print("\n" + "=" * 40)
@@ -305,8 +400,7 @@ def run_comprehensive_test():
     total = len(results)
     
     for test_name, success in results.items():
-        status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} {test_name}")
+        print(f"{PASS_S if success else FAIL_S} {test_name}")
     
     print(f"\nOverall: {passed}/{total} tests passed")
     
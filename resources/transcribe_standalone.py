@@ -16,11 +16,30 @@ import sys
 import json
 import argparse
 import logging
-import tempfile
+from logging.handlers import MemoryHandler, RotatingFileHandler
 import traceback
 from pathlib import Path
-from datetime import datetime
+import shutil
 import subprocess
+import tempfile
+import queue
+import threading
+import concurrent.futures
+
+# Load config/env once; variables already set in the environment take precedence
+CONFIG_ENV_FILE = Path.home() / "Applications" / "Audio2Text" / "config" / "env"
+try:
+    from dotenv import load_dotenv
+    load_dotenv(CONFIG_ENV_FILE, override=False)
+except ImportError:
+    if CONFIG_ENV_FILE.exists():
+        with open(CONFIG_ENV_FILE) as f:
+            for line in f:
+                # Same parsing as _load_env in test/test_installation.py
+                key, sep, value = line.strip().partition('=')
+                key = key.removeprefix('export ').strip()
+                if sep and key and not key.startswith('#'):
+                    os.environ.setdefault(key, value.strip().strip('"\''))
 
 # Import NPZ loading fix first (before any numpy imports)
 try:
@@ -43,6 +62,16 @@ except ImportError as e:
     MLX_AVAILABLE = False
     print(f"❌ MLX Whisper not available: {e}")
 
+# Fused attention kernel and short-window encoding for MLX Whisper
+MLX_SHORT_WINDOWS = False
+if MLX_AVAILABLE:
+    try:
+        import mlx_attention_fix
+        mlx_attention_fix.apply_attention_fix()
+        MLX_SHORT_WINDOWS = mlx_attention_fix.apply_encoder_fix()
+    except ImportError:
+        print("⚠️  Attention fix not found - using default MLX Whisper attention")
+
 # Audio processing
 try:
     import librosa
@@ -51,6 +80,21 @@ except ImportError:
     LIBROSA_AVAILABLE = False
     print("⚠️  Librosa not available - limited audio format support")
 
+# Fast resampling
+try:
+    import soxr
+    SOXR_AVAILABLE = True
+except ImportError:
+    SOXR_AVAILABLE = False
+    print("⚠️  soxr not available - resampling falls back to librosa")
+
+# Fast JSON serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Speaker diarization
 try:
     from pyannote.audio import Pipeline
@@ -70,13 +114,123 @@ except ImportError:
     print("⚠️  WhisperX fallback not available")
 
 
+# Weight bits for each --quantization choice (group size is fixed at 64)
+QUANTIZATION_BITS = {'q4': 4, 'q8': 8}
+
+# Cap on freed Metal buffers MLX keeps for reuse (its default is the device memory limit)
+MLX_CACHE_LIMIT_BYTES = 2 * 1024 ** 3
+
+# Inputs at least this long are converted from int16 with MLX rather than NumPy
+MLX_CONVERSION_MIN_SECONDS = 30 * 60
+
+# Trailing windows are trimmed to a multiple of this many mel frames (5 s)
+MEL_BUCKET_FRAMES = 500
+
+
+def downmix_to_mono(audio_data):
+    """Average the channels of (frames, channels) audio into a mono float32 signal"""
+    if audio_data.ndim == 1:
+        return audio_data
+    
+    if audio_data.shape[1] == 2:
+        # Sum and halve in place in one preallocated output buffer
+        mono = np.empty(audio_data.shape[0], dtype=np.float32)
+        np.add(audio_data[:, 0], audio_data[:, 1], out=mono)
+        np.multiply(mono, 0.5, out=mono)
+        return mono
+    
+    return audio_data.mean(axis=1, dtype=np.float32)
+
+
+def pcm16_to_mono_float32_mlx(audio_data):
+    """Downmix and scale (frames, channels) int16 PCM to mono float32 with MLX"""
+    x = mx.array(audio_data)
+    # Callers pass the decoded buffer directly so the int16 copy can be freed here
+    del audio_data
+    
+    # Accumulate one channel at a time instead of casting the whole stereo buffer
+    channels = x.shape[1] if x.ndim == 2 else 1
+    if x.ndim == 2:
+        mono = x[:, 0].astype(mx.float32)
+        for c in range(1, channels):
+            mono = mono + x[:, c].astype(mx.float32)
+    else:
+        mono = x.astype(mx.float32)
+    del x
+    
+    mono = mono * (1.0 / (32768.0 * channels))
+    mx.eval(mono)
+    
+    # Shares the MLX buffer; CPU consumers (diarization, WhisperX) read it in place
+    return np.asarray(mono)
+
+
+def iter_audio_windows(audio_data, window_samples):
+    """Yield consecutive fixed-size windows of an in-memory signal"""
+    for start in range(0, len(audio_data), window_samples):
+        yield audio_data[start:start + window_samples]
+
+
+def stream_audio_ffmpeg(audio_path, window_samples, max_pending=4):
+    """Decode audio with ffmpeg in the background, yielding 16 kHz mono windows as they arrive"""
+    cmd = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-threads', '0', '-i', str(audio_path),
+        '-f', 'f32le', '-ac', '1', '-acodec', 'pcm_f32le', '-ar', '16000',
+        '-'
+    ]
+    window_bytes = window_samples * 4
+    # Spool stderr to a file so a chatty ffmpeg cannot block on a full pipe
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, bufsize=window_bytes)
+    windows = queue.Queue(maxsize=max_pending)
+    
+    def produce():
+        try:
+            while True:
+                chunk = process.stdout.read(window_bytes)
+                if not chunk:
+                    break
+                windows.put(np.frombuffer(chunk, dtype=np.float32))
+        finally:
+            windows.put(None)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    
+    completed = False
+    try:
+        while (window := windows.get()) is not None:
+            yield window
+        completed = True
+    finally:
+        if not completed and process.poll() is None:
+            process.kill()
+        # Unblock the producer if it is waiting on a full queue
+        while producer.is_alive():
+            try:
+                windows.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        process.wait()
+        
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode('utf-8', errors='replace')
+        stderr_file.close()
+    
+    if process.returncode != 0:
+        raise RuntimeError(f"FFmpeg conversion failed: {stderr}")
+
+
 class Audio2TextTranscriber:
     """Main transcription class with multiple engine support"""
     
-    def __init__(self, model_size="large-v3-turbo", language=None, device="auto", output_dir=None):
+    def __init__(self, model_size="large-v3-turbo", language=None, device="auto", output_dir=None,
+                 batch_size=1, quantization="q4"):
         self.model_size = model_size
         self.language = language
         self.device = device
+        self.batch_size = batch_size or 1
+        self.quantization = quantization
         self.output_dir = Path(output_dir) if output_dir else None
         if self.output_dir:
             self.output_dir.mkdir(exist_ok=True)
@@ -85,6 +239,13 @@ class Audio2TextTranscriber:
         self.setup_logging()
         
         # Initialize models
+        self.mlx_model = None
+        self.mlx_model_path = None
+        
+        # Cap the MLX buffer cache; freed buffers beyond this are returned to the system
+        if MLX_AVAILABLE:
+            set_cache_limit = getattr(mx, 'set_cache_limit', None) or mx.metal.set_cache_limit
+            set_cache_limit(MLX_CACHE_LIMIT_BYTES)
         self.diarization_pipeline = None
         self.whisperx_model = None
         
@@ -100,67 +261,193 @@ class Audio2TextTranscriber:
             log_dir = Path.home() / "Applications" / "Audio2Text" / "logs"
         log_dir.mkdir(exist_ok=True)
         
-        log_file = log_dir / f"audio2text_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        log_file = log_dir / "audio2text.log"
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        
+        # One rotating log (10 files of 50 MB, as in settings.json), opened on
+        # first write; records are buffered and written in batches
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=50 * 1024 * 1024, backupCount=9, delay=True, encoding='utf-8'
+        )
+        file_handler.setFormatter(formatter)
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
         
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
+                MemoryHandler(1024, target=file_handler),
+                stream_handler
             ]
         )
         self.logger = logging.getLogger(__name__)
         
     def load_config(self):
-        """Load configuration from environment and config files"""
+        """Load configuration from environment (config/env is read at import)"""
         # HuggingFace token
         hf_token = os.getenv('HF_TOKEN')
-        if not hf_token:
-            # Try to load from config file
-            config_file = Path.home() / "Applications" / "Audio2Text" / "config" / "env"
-            if config_file.exists():
-                with open(config_file) as f:
-                    for line in f:
-                        if line.startswith('HF_TOKEN='):
-                            hf_token = line.split('=', 1)[1].strip()
-                            os.environ['HF_TOKEN'] = hf_token
-                            break
-        
         if hf_token:
-            os.environ['HUGGING_FACE_HUB_TOKEN'] = hf_token
+            os.environ.setdefault('HUGGING_FACE_HUB_TOKEN', hf_token)
             self.logger.info("✅ Hugging Face token configured")
         else:
             self.logger.warning("⚠️  No Hugging Face token found - some models may not download")
     
     
+    def get_mlx_model_name(self):
+        """Resolve the MLX Whisper model repository for the model size"""
+        # Handle special case for turbo model which doesn't have -mlx suffix
+        if "turbo" in self.model_size:
+            return f"mlx-community/whisper-{self.model_size}"
+        return f"mlx-community/whisper-{self.model_size}-mlx"
+    
+    def get_mlx_model_path(self):
+        """Resolve the MLX Whisper model to load, honouring the quantization setting"""
+        if self.mlx_model_path:
+            return self.mlx_model_path
+        
+        model_name = self.get_mlx_model_name()
+        if self.quantization not in QUANTIZATION_BITS:
+            # Resolve the hub repository to its local snapshot once
+            try:
+                from huggingface_hub import snapshot_download
+                self.mlx_model_path = snapshot_download(model_name)
+            except Exception as e:
+                self.logger.warning(f"Could not resolve {model_name} locally: {e}")
+                self.mlx_model_path = model_name
+            return self.mlx_model_path
+        
+        # Previously converted weights
+        models_dir = Path.home() / "Applications" / "Audio2Text" / "models" / "whisper"
+        local_dir = models_dir / f"{model_name.split('/')[-1]}-{self.quantization}"
+        if (local_dir / "config.json").exists():
+            self.mlx_model_path = str(local_dir)
+            return self.mlx_model_path
+        
+        # Published quantized variant; offline, auth and rate-limit errors propagate
+        from huggingface_hub import snapshot_download
+        from huggingface_hub.utils import RepositoryNotFoundError
+        try:
+            self.mlx_model_path = snapshot_download(f"{model_name}-{self.quantization}")
+            return self.mlx_model_path
+        except RepositoryNotFoundError:
+            self.logger.info(f"No published {self.quantization} variant of {model_name}, converting locally")
+        
+        self.mlx_model_path = self.quantize_mlx_model(
+            model_name, local_dir, QUANTIZATION_BITS[self.quantization]
+        )
+        return self.mlx_model_path
+    
+    def quantize_mlx_model(self, model_name, output_dir, bits, group_size=64):
+        """Quantize an MLX Whisper model once and cache it under the models directory"""
+        import mlx.nn as nn
+        from mlx.utils import tree_flatten
+        from huggingface_hub import snapshot_download
+        from mlx_whisper.load_models import load_model
+        
+        self.logger.info(f"Quantizing {model_name} to {bits}-bit (one-time conversion)...")
+        
+        source_dir = Path(snapshot_download(model_name))
+        with open(source_dir / "config.json") as f:
+            config = json.load(f)
+        
+        model = load_model(str(source_dir), dtype=mx.float16)
+        nn.quantize(model, group_size=group_size, bits=bits)
+        config['quantization'] = {'group_size': group_size, 'bits': bits}
+        
+        # mlx_whisper.load_model re-applies the quantization from config.json;
+        # the config is written last so an interrupted conversion is redone
+        output_dir.mkdir(parents=True, exist_ok=True)
+        mx.save_safetensors(str(output_dir / "weights.safetensors"), dict(tree_flatten(model.parameters())))
+        with open(output_dir / "config.json", 'w') as f:
+            json.dump(config, f, indent=4)
+        
+        self.logger.info(f"✅ Quantized model saved to {output_dir}")
+        return str(output_dir)
+    
+    def load_mlx_model(self, model_name):
+        """Load MLX Whisper model once and keep it for subsequent files"""
+        if self.mlx_model is not None:
+            return self.mlx_model
+        
+        from mlx_whisper.audio import N_FRAMES
+        from mlx_whisper.transcribe import ModelHolder
+        
+        self.logger.info(f"Loading MLX Whisper model: {model_name}")
+        
+        # ModelHolder is the cache mlx_whisper.transcribe uses, so the
+        # sequential path reuses this instance instead of reloading it
+        self.mlx_model = ModelHolder.get_model(model_name, mx.float16)
+        
+        # Warm-up pass compiles the Metal kernels before the first real file
+        warmup_mel = mx.zeros((1, N_FRAMES, self.mlx_model.dims.n_mels), dtype=mx.float16)
+        mx.eval(self.mlx_model.encoder(warmup_mel))
+        
+        self.logger.info("✅ MLX Whisper model loaded")
+        return self.mlx_model
+    
     def load_diarization_model(self):
         """Load speaker diarization model"""
         if not DIARIZATION_AVAILABLE:
             return False
             
         try:
+            import re
+            import torch
+            import pyannote.audio
+            
             self.logger.info("Loading speaker diarization model...")
             
-            # Check for valid local pipeline directory
-            models_dir = Path.home() / "Applications" / "Audio2Text" / "models" / "diarization"
+            # Leave CPU cores for MLX when diarization runs alongside transcription
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
             
             # A valid pipeline directory should contain config.yaml and have the right structure
             # The current local directory is not a valid pipeline, so always use HF repo
-            if (models_dir.exists() and 
-                (models_dir / "config.yaml").exists() and 
-                (models_dir / "pytorch_model.bin").exists()):
+            models_dir = Path.home() / "Applications" / "Audio2Text" / "models" / "diarization"
+            use_local = (models_dir.exists() and 
+                         (models_dir / "config.yaml").exists() and 
+                         (models_dir / "pytorch_model.bin").exists())
+            pipeline_source = str(models_dir) if use_local else "pyannote/speaker-diarization-3.1"
+            
+            # Pickled pipelines are only valid for the same source and library versions
+            source_key = pipeline_source
+            if use_local:
+                source_key = f"local{int((models_dir / 'config.yaml').stat().st_mtime)}"
+            cache_key = re.sub(r'[^A-Za-z0-9.]+', '_', (
+                f"{source_key}-pyannote{pyannote.audio.__version__}-torch{torch.__version__}"
+            ))
+            cached_pipeline = models_dir / f"pipeline-{cache_key}.pt"
+            
+            # A previously instantiated pipeline loads much faster than from_pretrained
+            if cached_pipeline.exists():
+                try:
+                    self.logger.info("Loading cached pipeline...")
+                    self.diarization_pipeline = torch.load(
+                        cached_pipeline, map_location='cpu', weights_only=False
+                    )
+                    self.logger.info("✅ Speaker diarization model loaded")
+                    return True
+                except Exception as e:
+                    self.logger.warning(f"Cached pipeline unusable, reloading: {e}")
+            
+            if use_local:
                 # Only use local if it's a complete pipeline
                 self.logger.info("Loading from local pipeline directory...")
-                self.diarization_pipeline = Pipeline.from_pretrained(str(models_dir))
+                self.diarization_pipeline = Pipeline.from_pretrained(pipeline_source)
             else:
                 # Load from Hugging Face repository
                 self.logger.info("Loading from Hugging Face repository...")
                 self.diarization_pipeline = Pipeline.from_pretrained(
-                    "pyannote/speaker-diarization-3.1",
+                    pipeline_source,
                     use_auth_token=os.getenv('HF_TOKEN')
                 )
             
+            # Cache the instantiated pipeline for the next run
+            try:
+                models_dir.mkdir(parents=True, exist_ok=True)
+                torch.save(self.diarization_pipeline, cached_pipeline)
+            except Exception as e:
+                self.logger.warning(f"Could not cache diarization pipeline: {e}")
+            
             self.logger.info("✅ Speaker diarization model loaded")
             return True
             
@@ -187,7 +474,7 @@ class Audio2TextTranscriber:
             return False
     
     def preprocess_audio(self, audio_path):
-        """Preprocess audio file to compatible format"""
+        """Preprocess audio file to 16 kHz mono (source path is None when only held in memory)"""
         audio_path = Path(audio_path)
         if not audio_path.exists():
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
@@ -198,73 +485,101 @@ class Audio2TextTranscriber:
         if audio_path.suffix.lower() in ['.wav', '.flac'] and LIBROSA_AVAILABLE:
             # Try direct loading first
             try:
-                audio_data, sample_rate = sf.read(str(audio_path))
-                if sample_rate == 16000:
+                info = sf.info(str(audio_path))
+                if info.samplerate == 16000:
                     self.logger.info("✅ Audio already in correct format")
-                    return str(audio_path), audio_data, sample_rate
+                    if (MLX_AVAILABLE and info.subtype == 'PCM_16' and
+                            info.duration >= MLX_CONVERSION_MIN_SECONDS):
+                        # Long recordings: keep the decoded buffer at 16 bits and
+                        # convert it in unified memory
+                        audio_data = pcm16_to_mono_float32_mlx(sf.read(str(audio_path), dtype='int16')[0])
+                    else:
+                        audio_data, _ = sf.read(str(audio_path), dtype='float32')
+                        audio_data = np.ascontiguousarray(downmix_to_mono(audio_data), dtype=np.float32)
+                    return str(audio_path), audio_data, info.samplerate
             except Exception:
                 pass
         
-        # Convert audio using librosa or ffmpeg
-        temp_wav = None
+        # Convert audio using soundfile+soxr, librosa or ffmpeg
         try:
-            if LIBROSA_AVAILABLE:
-                # Use librosa for conversion
-                self.logger.info("Converting audio with librosa...")
-                audio_data, sample_rate = librosa.load(str(audio_path), sr=16000, mono=True)
-                
-                # Save to temporary file
-                temp_wav = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                sf.write(temp_wav.name, audio_data, 16000)
-                temp_wav.close()
+            # Decode with soundfile where libsndfile supports the codec
+            audio_data = None
+            if SOXR_AVAILABLE:
+                try:
+                    audio_data, sample_rate = sf.read(str(audio_path), dtype='float32', always_2d=False)
+                except Exception:
+                    audio_data = None
+            
+            if audio_data is not None or LIBROSA_AVAILABLE:
+                if audio_data is not None:
+                    # Use soxr for resampling
+                    self.logger.info("Converting audio with soundfile and soxr...")
+                    audio_data = downmix_to_mono(audio_data)
+                    if sample_rate != 16000:
+                        audio_data = soxr.resample(audio_data, sample_rate, 16000, quality='HQ')
+                else:
+                    # Use librosa for codecs soundfile cannot open (mp3/m4a via audioread)
+                    self.logger.info("Converting audio with librosa...")
+                    audio_data, sample_rate = librosa.load(str(audio_path), sr=16000, mono=True)
                 
                 self.logger.info("✅ Audio converted successfully")
-                return temp_wav.name, audio_data, 16000
+                return None, audio_data, 16000
                 
             else:
-                # Use ffmpeg fallback
+                # Use ffmpeg fallback, reading raw 16 kHz mono PCM from its stdout
                 self.logger.info("Converting audio with ffmpeg...")
-                temp_wav = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                temp_wav.close()
-                
                 cmd = [
-                    'ffmpeg', '-i', str(audio_path),
-                    '-ar', '16000', '-ac', '1', '-f', 'wav',
-                    '-y', temp_wav.name
+                    'ffmpeg', '-nostdin', '-threads', '0', '-i', str(audio_path),
+                    '-f', 'f32le', '-ac', '1', '-acodec', 'pcm_f32le', '-ar', '16000',
+                    '-'
                 ]
                 
-                result = subprocess.run(cmd, capture_output=True, text=True)
+                result = subprocess.run(cmd, capture_output=True)
                 if result.returncode != 0:
-                    raise RuntimeError(f"FFmpeg conversion failed: {result.stderr}")
+                    stderr = result.stderr.decode('utf-8', errors='replace')
+                    raise RuntimeError(f"FFmpeg conversion failed: {stderr}")
                 
-                # Load the converted audio
-                audio_data, sample_rate = sf.read(temp_wav.name)
+                audio_data = np.frombuffer(result.stdout, dtype=np.float32)
                 self.logger.info("✅ Audio converted with ffmpeg")
-                return temp_wav.name, audio_data, sample_rate
+                return str(audio_path), audio_data, 16000
                 
         except Exception as e:
-            if temp_wav and os.path.exists(temp_wav.name):
-                os.unlink(temp_wav.name)
             raise RuntimeError(f"Audio preprocessing failed: {e}")
     
-    def transcribe_with_mlx(self, audio_path):
-        """Transcribe using MLX Whisper"""
+    def can_stream_audio(self, audio_path):
+        """Check whether audio can go from ffmpeg straight into batched MLX decoding"""
+        if not MLX_AVAILABLE or self.batch_size <= 1:
+            return False
+        # Files libsndfile reads stay on the soundfile path; everything else is
+        # streamed from ffmpeg rather than fully decoded by librosa first
+        try:
+            sf.info(str(audio_path))
+            return False
+        except Exception:
+            pass
+        return shutil.which('ffmpeg') is not None
+    
+    def transcribe_with_mlx(self, audio):
+        """Transcribe using MLX Whisper (audio is a file path, 16 kHz mono array or iterable of windows)"""
         try:
             self.logger.info("Transcribing with MLX Whisper...")
             
-            # Determine model path
-            # Handle special case for turbo model which doesn't have -mlx suffix
-            if "turbo" in self.model_size:
-                model_name = f"mlx-community/whisper-{self.model_size}"
-            else:
-                model_name = f"mlx-community/whisper-{self.model_size}-mlx"
+            model_name = self.get_mlx_model_path()
+            model = self.load_mlx_model(model_name)
             
-            # Transcribe using the direct API
-            result = mlx_whisper.transcribe(
-                audio_path,
-                path_or_hf_repo=model_name,
-                verbose=True
-            )
+            if self.batch_size > 1:
+                # Decode 30 s windows in batches
+                result = self.transcribe_with_mlx_batched(audio, model)
+            else:
+                if not isinstance(audio, (str, np.ndarray)):
+                    audio = np.concatenate(list(audio))
+                
+                # Transcribe using the direct API
+                result = mlx_whisper.transcribe(
+                    audio,
+                    path_or_hf_repo=model_name,
+                    verbose=True
+                )
             
             # Add language if detected
             if self.language:
@@ -277,6 +592,123 @@ class Audio2TextTranscriber:
             self.logger.error(f"MLX transcription failed: {e}")
             raise
     
+    def transcribe_with_mlx_batched(self, audio, model):
+        """Transcribe 30 s windows with batched MLX Whisper decoding (audio is a file path, array or iterable of windows)"""
+        from mlx_whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE, load_audio, log_mel_spectrogram
+        from mlx_whisper.decoding import DecodingOptions
+        from mlx_whisper.tokenizer import get_tokenizer
+        
+        self.logger.info(f"Batched decoding with batch size {self.batch_size}")
+        
+        tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=self.language,
+            task="transcribe"
+        )
+        options = DecodingOptions(language=self.language, task="transcribe")
+        time_precision = (N_FRAMES // model.dims.n_audio_ctx) * HOP_LENGTH / SAMPLE_RATE
+        
+        if isinstance(audio, str):
+            audio = np.asarray(load_audio(audio))
+        if isinstance(audio, np.ndarray):
+            audio = iter_audio_windows(audio, N_SAMPLES)
+        
+        segments = []
+        language = self.language
+        batch = []
+        for index, window in enumerate(audio):
+            # Pad each window to 30 s so its tail holds real (silent) mel frames
+            mel = log_mel_spectrogram(
+                window, n_mels=model.dims.n_mels, padding=N_SAMPLES - len(window)
+            )[:N_FRAMES]
+            
+            # Encode a short trailing window at its own length (rounded up to a
+            # bucket) instead of padding it to 30 s
+            length = N_FRAMES
+            if len(window) < N_SAMPLES and MLX_SHORT_WINDOWS:
+                real_frames = -(-len(window) // HOP_LENGTH)
+                length = min(-(-real_frames // MEL_BUCKET_FRAMES) * MEL_BUCKET_FRAMES, N_FRAMES)
+            
+            # Batches must be rectangular, so a window of another length starts a new batch
+            if batch and (len(batch) == self.batch_size or batch[-1][2].shape[0] != length):
+                batch_segments, batch_language = self._decode_mel_batch(model, batch, options, tokenizer, time_precision)
+                segments.extend(batch_segments)
+                language = language or batch_language
+                batch = []
+            
+            batch.append((index * N_SAMPLES / SAMPLE_RATE, len(window) / SAMPLE_RATE, mel[:length]))
+        
+        if batch:
+            batch_segments, batch_language = self._decode_mel_batch(model, batch, options, tokenizer, time_precision)
+            segments.extend(batch_segments)
+            language = language or batch_language
+        
+        for i, segment in enumerate(segments):
+            segment['id'] = i
+        
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': language
+        }
+    
+    def _decode_mel_batch(self, model, batch, options, tokenizer, time_precision):
+        """Decode equally sized (offset, duration, mel) windows into segments"""
+        from mlx_whisper.decoding import decode
+        
+        mel_batch = mx.stack([mel for _, _, mel in batch]).astype(mx.float16)
+        
+        segments = []
+        language = None
+        for (offset, duration, _), decoded in zip(batch, decode(model, mel_batch, options)):
+            language = language or decoded.language
+            
+            # Skip windows the model considers silent
+            if decoded.no_speech_prob > 0.6 and decoded.avg_logprob < -1.0:
+                continue
+            
+            segments.extend(self._segments_from_tokens(
+                decoded.tokens, tokenizer, offset, offset + duration, time_precision
+            ))
+        
+        return segments, language
+    
+    def _segments_from_tokens(self, tokens, tokenizer, offset, window_end, time_precision):
+        """Split a decoded window into segments at its timestamp tokens"""
+        segments = []
+        start = None
+        text_tokens = []
+        
+        for token in tokens:
+            if token < tokenizer.timestamp_begin:
+                text_tokens.append(token)
+                continue
+            
+            time = offset + (token - tokenizer.timestamp_begin) * time_precision
+            if start is not None and text_tokens:
+                segments.append({
+                    'start': start,
+                    'end': time,
+                    'text': tokenizer.decode(text_tokens),
+                    'tokens': text_tokens
+                })
+                text_tokens = []
+                start = None
+            else:
+                start = time
+        
+        # Text without a closing timestamp runs to the end of the window
+        if text_tokens:
+            segments.append({
+                'start': offset if start is None else start,
+                'end': window_end,
+                'text': tokenizer.decode(text_tokens),
+                'tokens': text_tokens
+            })
+        
+        return segments
+    
     def transcribe_with_whisperx(self, audio_path, audio_data, sample_rate):
         """Transcribe using WhisperX fallback"""
         if not self.whisperx_model:
@@ -286,7 +718,8 @@ class Audio2TextTranscriber:
         try:
             self.logger.info("Transcribing with WhisperX...")
             
-            result = self.whisperx_model.transcribe(audio_data)
+            # 16 kHz mono float32 from preprocess_audio, so WhisperX needn't reload the file
+            result = self.whisperx_model.transcribe(audio_data, batch_size=16)
             
             self.logger.info("✅ WhisperX transcription completed")
             return result
@@ -295,35 +728,71 @@ class Audio2TextTranscriber:
             self.logger.error(f"WhisperX transcription failed: {e}")
             raise
     
-    def add_speaker_diarization(self, audio_path, transcription_result):
-        """Add speaker diarization to transcription"""
+    def run_speaker_diarization(self, audio):
+        """Run speaker diarization (audio is a file path or 16 kHz mono array)"""
         if not self.diarization_pipeline:
             if not self.load_diarization_model():
                 self.logger.warning("Speaker diarization not available")
-                return transcription_result
+                return None
         
         try:
-            self.logger.info("Adding speaker diarization...")
+            self.logger.info("Running speaker diarization...")
             
-            # Run diarization
-            diarization = self.diarization_pipeline(audio_path)
+            if isinstance(audio, np.ndarray):
+                # pyannote takes in-memory audio as a (channel, time) tensor
+                import torch
+                audio = {
+                    'waveform': torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))[None],
+                    'sample_rate': 16000
+                }
+            return self.diarization_pipeline(audio)
+            
+        except Exception as e:
+            self.logger.error(f"Speaker diarization failed: {e}")
+            return None
+    
+    def merge_speaker_diarization(self, diarization, transcription_result):
+        """Label transcription segments with speakers from a diarization result"""
+        if diarization is None:
+            return transcription_result
+        
+        try:
+            # Collect speaker turns into arrays sorted by start time
+            turns = sorted(diarization.itertracks(yield_label=True), key=lambda track: track[0].start)
+            speaker_ids = {}
+            turn_starts = np.fromiter((turn.start for turn, _, _ in turns), dtype=np.float64, count=len(turns))
+            turn_ends = np.fromiter((turn.end for turn, _, _ in turns), dtype=np.float64, count=len(turns))
+            turn_speakers = np.fromiter(
+                (speaker_ids.setdefault(speaker, len(speaker_ids)) for _, _, speaker in turns),
+                dtype=np.int64, count=len(turns)
+            )
+            speaker_labels = list(speaker_ids)
             
-            # Merge with transcription
+            # Merge with transcription: each segment gets the speaker with the
+            # longest total overlap
             segments = transcription_result.get('segments', [])
             for segment in segments:
                 start_time = segment['start']
                 end_time = segment['end']
                 
-                # Find speaker for this segment
-                speakers = []
-                for turn, _, speaker in diarization.itertracks(yield_label=True):
-                    if turn.start <= start_time <= turn.end or turn.start <= end_time <= turn.end:
-                        speakers.append(speaker)
+                # Only turns starting before the segment ends can overlap it
+                candidates = np.searchsorted(turn_starts, end_time, side='left')
+                overlap = (np.minimum(turn_ends[:candidates], end_time) -
+                           np.maximum(turn_starts[:candidates], start_time))
+                mask = overlap > 0
                 
-                if speakers:
-                    segment['speaker'] = max(set(speakers), key=speakers.count)
-                else:
-                    segment['speaker'] = 'UNKNOWN'
+                if mask.any():
+                    votes = np.bincount(turn_speakers[:candidates][mask], weights=overlap[mask])
+                    segment['speaker'] = speaker_labels[votes.argmax()]
+                    continue
+                
+                # A zero-length segment takes the latest-starting turn containing its point
+                segment['speaker'] = 'UNKNOWN'
+                if end_time <= start_time:
+                    candidates = np.searchsorted(turn_starts, start_time, side='right')
+                    containing = np.flatnonzero(turn_ends[:candidates] >= start_time)
+                    if containing.size:
+                        segment['speaker'] = speaker_labels[turn_speakers[containing[-1]]]
             
             self.logger.info("✅ Speaker diarization completed")
             return transcription_result
@@ -332,18 +801,28 @@ class Audio2TextTranscriber:
             self.logger.error(f"Speaker diarization failed: {e}")
             return transcription_result
     
+    def add_speaker_diarization(self, audio, transcription_result):
+        """Add speaker diarization to transcription (audio is a file path or 16 kHz mono array)"""
+        diarization = self.run_speaker_diarization(audio)
+        return self.merge_speaker_diarization(diarization, transcription_result)
+    
     def format_output(self, result, format_type, include_speakers=False):
         """Format transcription result"""
         if format_type == 'json':
+            if ORJSON_AVAILABLE:
+                # Serializes NumPy scalars/arrays in segments without a custom encoder
+                return orjson.dumps(
+                    result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                ).decode('utf-8')
             return json.dumps(result, indent=2, ensure_ascii=False)
         
         elif format_type == 'srt':
             srt_content = []
             segments = result.get('segments', [])
+            starts = self.format_timestamps_srt([segment['start'] for segment in segments])
+            ends = self.format_timestamps_srt([segment['end'] for segment in segments])
             
-            for i, segment in enumerate(segments, 1):
-                start = self.format_timestamp_srt(segment['start'])
-                end = self.format_timestamp_srt(segment['end'])
+            for i, (segment, start, end) in enumerate(zip(segments, starts, ends), 1):
                 text = segment['text'].strip()
                 
                 if include_speakers and 'speaker' in segment:
@@ -376,47 +855,89 @@ class Audio2TextTranscriber:
     
     def format_timestamp_srt(self, seconds):
         """Format timestamp for SRT format"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millisecs = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
+        return self.format_timestamps_srt([seconds])[0]
+    
+    def format_timestamps_srt(self, seconds):
+        """Format a sequence of timestamps for SRT format in one vectorized pass"""
+        millisecs = np.floor(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+        hours, millisecs = np.divmod(millisecs, 3_600_000)
+        minutes, millisecs = np.divmod(millisecs, 60_000)
+        secs, millisecs = np.divmod(millisecs, 1000)
+        return ["%02d:%02d:%02d,%03d" % parts
+                for parts in zip(hours.tolist(), minutes.tolist(), secs.tolist(), millisecs.tolist())]
     
     def transcribe_file(self, audio_path, output_format='txt', include_speakers=False):
         """Main transcription method"""
         audio_path = Path(audio_path)
         self.logger.info(f"🎙️  Starting transcription: {audio_path}")
         
-        processed_audio_path = None
         try:
-            # Preprocess audio
-            processed_audio_path, audio_data, sample_rate = self.preprocess_audio(audio_path)
-            
-            # Try transcription engines in order of preference
             result = None
+            mlx_failed = False
             
-            # 1. Try MLX Whisper first (best for Apple Silicon)
-            if MLX_AVAILABLE:
+            # Files that need ffmpeg are decoded while MLX encodes earlier windows,
+            # unless diarization needs the whole signal up front
+            if not include_speakers and self.can_stream_audio(audio_path):
+                stream_errors = []
+                
+                def stream_windows():
+                    from mlx_whisper.audio import N_SAMPLES
+                    try:
+                        yield from stream_audio_ffmpeg(audio_path, N_SAMPLES)
+                    except Exception as e:
+                        stream_errors.append(e)
+                        raise
+                
                 try:
-                    result = self.transcribe_with_mlx(processed_audio_path)
+                    self.logger.info("Streaming audio from ffmpeg into MLX Whisper...")
+                    result = self.transcribe_with_mlx(stream_windows())
                     engine_used = "MLX Whisper"
                 except Exception as e:
-                    self.logger.warning(f"MLX transcription failed, trying fallback: {e}")
-            
-            # 2. Try WhisperX fallback
-            if not result and WHISPERX_AVAILABLE:
-                try:
-                    result = self.transcribe_with_whisperx(processed_audio_path, audio_data, sample_rate)
-                    engine_used = "WhisperX"
-                except Exception as e:
-                    self.logger.warning(f"WhisperX transcription failed: {e}")
+                    if stream_errors:
+                        # Decoding failed, not the model; retry MLX on the preprocessed audio
+                        self.logger.warning(f"Audio streaming failed, decoding the whole file: {e}")
+                    else:
+                        mlx_failed = True
+                        self.logger.warning(f"MLX transcription failed, trying fallback: {e}")
             
+            # Preprocess audio
             if not result:
-                raise RuntimeError("All transcription engines failed")
+                processed_audio_path, audio_data, sample_rate = self.preprocess_audio(audio_path)
             
-            # Add speaker diarization if requested
-            if include_speakers:
-                result = self.add_speaker_diarization(processed_audio_path, result)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            try:
+                # Diarization is independent of transcription, so run it in the
+                # background while the transcription engine works
+                diarization_future = None
+                if include_speakers:
+                    diarization_future = executor.submit(self.run_speaker_diarization, audio_data)
+                
+                # Try transcription engines in order of preference
+                # 1. Try MLX Whisper first (best for Apple Silicon)
+                if not result and not mlx_failed and MLX_AVAILABLE:
+                    try:
+                        result = self.transcribe_with_mlx(audio_data)
+                        engine_used = "MLX Whisper"
+                    except Exception as e:
+                        self.logger.warning(f"MLX transcription failed, trying fallback: {e}")
+                
+                # 2. Try WhisperX fallback
+                if not result and WHISPERX_AVAILABLE:
+                    try:
+                        result = self.transcribe_with_whisperx(processed_audio_path, audio_data, sample_rate)
+                        engine_used = "WhisperX"
+                    except Exception as e:
+                        self.logger.warning(f"WhisperX transcription failed: {e}")
+                
+                if not result:
+                    raise RuntimeError("All transcription engines failed")
+                
+                # Add speaker diarization if requested
+                if diarization_future:
+                    result = self.merge_speaker_diarization(diarization_future.result(), result)
+            finally:
+                # Never block on a diarization result that a failed transcription throws away
+                executor.shutdown(wait=False, cancel_futures=True)
             
             # Format output
             formatted_result = self.format_output(result, output_format, include_speakers)
@@ -453,14 +974,6 @@ class Audio2TextTranscriber:
                 'success': False,
                 'error': str(e)
             }
-        
-        finally:
-            # Clean up temporary files
-            if processed_audio_path and processed_audio_path != str(audio_path):
-                try:
-                    os.unlink(processed_audio_path)
-                except:
-                    pass
 
 
 def main():
@@ -491,6 +1004,12 @@ Supported languages: Auto-detect or specify (en, de, fr, es, it, etc.)
     parser.add_argument('--speakers', '-s', action='store_true',
                        help='Enable speaker diarization')
     parser.add_argument('--output-dir', '-o', help='Output directory (default: ./output)')
+    parser.add_argument('--quantization', '-q', default='q4',
+                       choices=['none', 'q4', 'q8'],
+                       help='MLX Whisper weight quantization (default: q4)')
+    parser.add_argument('--batch-size', '-b', type=int,
+                       default=1,
+                       help='MLX decode batch size; values above 1 decode hard 30 s windows in parallel, faster but less accurate (default: 1)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Verbose logging')
     
@@ -515,7 +1034,9 @@ Supported languages: Auto-detect or specify (en, de, fr, es, it, etc.)
     transcriber = Audio2TextTranscriber(
         model_size=args.model,
         language=args.language,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        batch_size=args.batch_size,
+        quantization=args.quantization
     )
     
     # Run transcription